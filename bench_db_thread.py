@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Astraeus 数据库线程基准测试
+对比数据库写入在事件循环中执行与在专用数据库线程中执行时的事件循环延迟
+"""
+
+import asyncio
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DB_PATH = Path("trading_system.db")
+# 模拟一次5分钟数据更新：每个资产写入一条价格记录，每条记录单独提交
+BURST_ASSETS = 300
+# 事件循环延迟采样间隔（秒）
+SAMPLE_INTERVAL_SECONDS = 0.01
+
+def write_burst(conn):
+    """模拟数据更新写入"""
+    for asset_id in range(1, BURST_ASSETS + 1):
+        conn.execute(
+            "INSERT INTO prices (asset_id, timestamp, open_price, high_price, low_price, close_price, volume) "
+            "VALUES (?, datetime('now'), 1.0, 1.0, 1.0, 1.0, 0.0)",
+            (asset_id,)
+        )
+        conn.commit()
+
+async def sample_lag(stop_event, samples):
+    """持续采样事件循环延迟"""
+    loop = asyncio.get_running_loop()
+    while not stop_event.is_set():
+        started = loop.time()
+        await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+        samples.append(max(loop.time() - started - SAMPLE_INTERVAL_SECONDS, 0))
+
+async def run_case(conn, executor):
+    """执行一次写入并返回事件循环延迟样本和写入耗时"""
+    stop_event = asyncio.Event()
+    samples = []
+    sampler = asyncio.create_task(sample_lag(stop_event, samples))
+    await asyncio.sleep(SAMPLE_INTERVAL_SECONDS * 5)
+
+    started = time.perf_counter()
+    if executor is None:
+        write_burst(conn)
+    else:
+        await asyncio.get_running_loop().run_in_executor(executor, write_burst, conn)
+    elapsed = time.perf_counter() - started
+
+    await asyncio.sleep(SAMPLE_INTERVAL_SECONDS * 5)
+    stop_event.set()
+    await sampler
+    return samples, elapsed
+
+def print_result(title, samples, elapsed):
+    """打印结果"""
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99)] if samples else 0
+    print(f"{title:<16} 写入耗时: {elapsed * 1000:8.1f} ms  "
+          f"最大延迟: {max(samples, default=0) * 1000:8.1f} ms  p99: {p99 * 1000:8.1f} ms")
+
+async def main():
+    """主函数"""
+    print("🚀 Astraeus 数据库线程基准测试")
+    print(f"📋 模拟写入: {BURST_ASSETS} 条价格记录，每条单独提交")
+    print()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 在数据库副本上测试，不影响真实数据
+        db_copy = Path(tmp_dir) / DB_PATH.name
+        shutil.copy(DB_PATH, db_copy)
+        conn = sqlite3.connect(db_copy, check_same_thread=False)
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="astraeus-db")
+
+        try:
+            samples, elapsed = await run_case(conn, None)
+            print_result("事件循环中写入", samples, elapsed)
+
+            samples, elapsed = await run_case(conn, executor)
+            print_result("数据库线程写入", samples, elapsed)
+        finally:
+            executor.shutdown(wait=True)
+            conn.close()
+
+if __name__ == "__main__":
+    if not DB_PATH.exists():
+        print("❌ 数据库文件不存在")
+    else:
+        asyncio.run(main())
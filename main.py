@@ -4,10 +4,26 @@ Astraeus - 加密货币智能交易与投资管理系统
 """
 
 import asyncio
+import json
+import logging
+import os
 import signal
+import sqlite3
 import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from aiohttp import web
 from loguru import logger
 from pathlib import Path
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+from sqlalchemy import DateTime, bindparam, event, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
 
 # 添加src目录到Python路径
 sys.path.append(str(Path(__file__).parent / "src"))
@@ -16,13 +32,410 @@ from src.config.settings import config
 from src.database.manager import db_manager
 from src.scheduler.automation import automation_scheduler
 from src.notifications.telegram import telegram_notifier
+from status import provider_probes, run_health_checks, scheduler_probe, telegram_probe
+
+# 资产池规模与定时刷新间隔；资产池只刷新行情，参与数据更新和分析的活跃资产数量受上限控制
+ASSET_UNIVERSE_SIZE = int(os.getenv("ASSET_UNIVERSE_SIZE", "250"))
+ACTIVE_ASSET_LIMIT = int(os.getenv("ACTIVE_ASSET_LIMIT", "20"))
+ASSET_REFRESH_INTERVAL_HOURS = float(os.getenv("ASSET_REFRESH_INTERVAL_HOURS", "6"))
+
+# SQLite 生产配置：WAL 允许监控工具读取时不阻塞写入
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,  # 负数表示 KiB，即 64 MiB
+    "mmap_size": 268435456,  # 256 MiB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,  # 毫秒
+    # INSERT OR REPLACE 删除冲突行时也触发 DELETE 触发器，汇总表计数才不会偏差
+    "recursive_triggers": "ON",
+}
+
+# 由触发器维护的汇总表，监控工具无需扫描历史数据即可读取最新状态
+COUNTED_TABLES = ("assets", "prices", "analyses", "trades", "trading_signals")
+
+# 汇总表由触发器维护，monitor.py 和 status.py 直接读取。覆盖 INSERT、UPDATE、DELETE；
+# INSERT OR REPLACE 依赖连接开启 recursive_triggers（见 SQLITE_PRAGMAS），
+# 未经本进程引擎、未开启该设置的写入方不得对计数表使用 REPLACE
+SUMMARY_TABLES_SQL = [
+    """CREATE TABLE IF NOT EXISTS table_counts (
+        table_name VARCHAR(50) PRIMARY KEY,
+        row_count INTEGER NOT NULL,
+        updated_at REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS latest_price (
+        asset_id INTEGER PRIMARY KEY REFERENCES assets (id),
+        timestamp DATETIME NOT NULL,
+        close_price FLOAT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS latest_analysis (
+        asset_id INTEGER PRIMARY KEY REFERENCES assets (id),
+        timestamp DATETIME NOT NULL,
+        overall_score FLOAT NOT NULL,
+        signal_type VARCHAR(20),
+        signal_strength FLOAT
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS trg_prices_latest AFTER INSERT ON prices BEGIN
+        INSERT INTO latest_price (asset_id, timestamp, close_price)
+        VALUES (NEW.asset_id, NEW.timestamp, NEW.close_price)
+        ON CONFLICT(asset_id) DO UPDATE SET
+            timestamp = excluded.timestamp,
+            close_price = excluded.close_price
+        WHERE excluded.timestamp >= latest_price.timestamp;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_analyses_latest AFTER INSERT ON analyses BEGIN
+        INSERT INTO latest_analysis (asset_id, timestamp, overall_score, signal_type, signal_strength)
+        VALUES (NEW.asset_id, NEW.timestamp, NEW.overall_score, NEW.signal_type, NEW.signal_strength)
+        ON CONFLICT(asset_id) DO UPDATE SET
+            timestamp = excluded.timestamp,
+            overall_score = excluded.overall_score,
+            signal_type = excluded.signal_type,
+            signal_strength = excluded.signal_strength
+        WHERE excluded.timestamp >= latest_analysis.timestamp;
+    END""",
+    # 删除的是某资产的最新记录时（如数据清理），从剩余记录中重新取最新一条
+    """CREATE TRIGGER IF NOT EXISTS trg_prices_latest_delete AFTER DELETE ON prices
+    WHEN OLD.timestamp >= (SELECT timestamp FROM latest_price WHERE asset_id = OLD.asset_id) BEGIN
+        DELETE FROM latest_price WHERE asset_id = OLD.asset_id;
+        INSERT OR REPLACE INTO latest_price (asset_id, timestamp, close_price)
+        SELECT asset_id, timestamp, close_price FROM prices
+        WHERE asset_id = OLD.asset_id
+        ORDER BY timestamp DESC
+        LIMIT 1;
+    END""",
+    # analyses 没有 (asset_id, timestamp) 索引，该查询沿 timestamp 索引倒序查找
+    """CREATE TRIGGER IF NOT EXISTS trg_analyses_latest_delete AFTER DELETE ON analyses
+    WHEN OLD.timestamp >= (SELECT timestamp FROM latest_analysis WHERE asset_id = OLD.asset_id) BEGIN
+        DELETE FROM latest_analysis WHERE asset_id = OLD.asset_id;
+        INSERT OR REPLACE INTO latest_analysis (asset_id, timestamp, overall_score, signal_type, signal_strength)
+        SELECT asset_id, timestamp, overall_score, signal_type, signal_strength FROM analyses
+        WHERE asset_id = OLD.asset_id
+        ORDER BY timestamp DESC
+        LIMIT 1;
+    END""",
+    # 原地修正记录（如重写未收盘的K线）时，涉及最新记录则为新旧资产重新取最新一条
+    """CREATE TRIGGER IF NOT EXISTS trg_prices_latest_update AFTER UPDATE OF asset_id, timestamp, close_price ON prices
+    WHEN OLD.timestamp >= (SELECT timestamp FROM latest_price WHERE asset_id = OLD.asset_id)
+        OR NEW.timestamp >= COALESCE((SELECT timestamp FROM latest_price WHERE asset_id = NEW.asset_id), NEW.timestamp) BEGIN
+        DELETE FROM latest_price WHERE asset_id IN (OLD.asset_id, NEW.asset_id);
+        INSERT OR REPLACE INTO latest_price (asset_id, timestamp, close_price)
+        SELECT asset_id, timestamp, close_price FROM prices
+        WHERE asset_id = OLD.asset_id
+        ORDER BY timestamp DESC
+        LIMIT 1;
+        INSERT OR REPLACE INTO latest_price (asset_id, timestamp, close_price)
+        SELECT asset_id, timestamp, close_price FROM prices
+        WHERE asset_id = NEW.asset_id
+        ORDER BY timestamp DESC
+        LIMIT 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_analyses_latest_update
+    AFTER UPDATE OF asset_id, timestamp, overall_score, signal_type, signal_strength ON analyses
+    WHEN OLD.timestamp >= (SELECT timestamp FROM latest_analysis WHERE asset_id = OLD.asset_id)
+        OR NEW.timestamp >= COALESCE((SELECT timestamp FROM latest_analysis WHERE asset_id = NEW.asset_id), NEW.timestamp) BEGIN
+        DELETE FROM latest_analysis WHERE asset_id IN (OLD.asset_id, NEW.asset_id);
+        INSERT OR REPLACE INTO latest_analysis (asset_id, timestamp, overall_score, signal_type, signal_strength)
+        SELECT asset_id, timestamp, overall_score, signal_type, signal_strength FROM analyses
+        WHERE asset_id = OLD.asset_id
+        ORDER BY timestamp DESC
+        LIMIT 1;
+        INSERT OR REPLACE INTO latest_analysis (asset_id, timestamp, overall_score, signal_type, signal_strength)
+        SELECT asset_id, timestamp, overall_score, signal_type, signal_strength FROM analyses
+        WHERE asset_id = NEW.asset_id
+        ORDER BY timestamp DESC
+        LIMIT 1;
+    END""",
+]
+
+# 汇总表补齐语句：(检查语句, 补齐语句)。仅当检查语句无结果（汇总表首次创建）时
+# 才扫描历史数据，之后由触发器维护，重启时不再付出与历史数据量相关的开销
+SUMMARY_SEED_SQL = [
+    (
+        "SELECT 1 FROM latest_price LIMIT 1",
+        """INSERT INTO latest_price (asset_id, timestamp, close_price)
+            SELECT asset_id, MAX(timestamp), close_price FROM prices GROUP BY asset_id""",
+    ),
+    (
+        "SELECT 1 FROM latest_analysis LIMIT 1",
+        """INSERT INTO latest_analysis (asset_id, timestamp, overall_score, signal_type, signal_strength)
+            SELECT asset_id, MAX(timestamp), overall_score, signal_type, signal_strength FROM analyses
+            GROUP BY asset_id""",
+    ),
+]
+
+for _table in COUNTED_TABLES:
+    SUMMARY_SEED_SQL.append((
+        f"SELECT 1 FROM table_counts WHERE table_name = '{_table}'",
+        f"""INSERT INTO table_counts (table_name, row_count, updated_at)
+            SELECT '{_table}', COUNT(*), julianday('now') FROM {_table}""",
+    ))
+    SUMMARY_TABLES_SQL += [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{_table}_count_insert AFTER INSERT ON {_table} BEGIN
+            UPDATE table_counts SET row_count = row_count + 1, updated_at = julianday('now')
+            WHERE table_name = '{_table}';
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{_table}_count_delete AFTER DELETE ON {_table} BEGIN
+            UPDATE table_counts SET row_count = row_count - 1, updated_at = julianday('now')
+            WHERE table_name = '{_table}';
+        END""",
+    ]
+
+# Prometheus 监控端点
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+LOOP_LAG_SAMPLE_INTERVAL_SECONDS = 0.5
+
+PROVIDER_REQUEST_SECONDS = Histogram(
+    "astraeus_provider_request_seconds", "数据源请求耗时", ["provider", "endpoint"]
+)
+DB_FLUSH_SECONDS = Histogram(
+    "astraeus_db_flush_seconds", "数据库批量写入耗时", ["operation"]
+)
+SCHEDULER_JOB_SECONDS = Histogram(
+    "astraeus_scheduler_job_seconds", "定时任务耗时", ["job"]
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "astraeus_event_loop_lag_seconds", "事件循环延迟",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+# 日志管道：所有 sink 均在后台线程中写出，WARNING 及以上批量写入 logs 表
+LOG_TABLE_LEVEL = "WARNING"
+LOG_TABLE_BATCH_SIZE = 100
+LOG_TABLE_FLUSH_INTERVAL_SECONDS = 5
+LOG_TABLE_MAX_PENDING = 10000
+DEBUG_LOG_RATE_PER_SECOND = 20  # 每个调用位置每秒最多记录的 DEBUG 日志数
+
+# 事件循环阻塞分析（ASTRAEUS_PROFILE=1 开启）
+PROFILE_ENABLED = os.getenv("ASTRAEUS_PROFILE", "").lower() in ("1", "true", "yes")
+SLOW_CALLBACK_THRESHOLD_SECONDS = 0.1
+PROFILE_OUTPUT_PATH = Path("logs/loop_stalls.folded")
+
+# 关闭时等待后台任务、调度器和数据库写入完成的最长时间（秒）
+SHUTDOWN_DRAIN_TIMEOUT_SECONDS = 5
+
+
+@event.listens_for(Engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """为每个新建的 SQLite 连接应用生产配置"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+class DebugRateLimiter:
+    """按调用位置限制 DEBUG 日志速率，超出部分直接丢弃"""
+    
+    def __init__(self, per_second=DEBUG_LOG_RATE_PER_SECOND):
+        self.per_second = per_second
+        self.dropped = 0
+        self._windows = {}
+    
+    def __call__(self, record):
+        if record["level"].no > logging.DEBUG:
+            return True
+        
+        key = (record["name"], record["function"], record["line"])
+        second = int(time.monotonic())
+        window, count = self._windows.get(key, (second, 0))
+        if window != second:
+            window, count = second, 0
+        self._windows[key] = (window, count + 1)
+        
+        if count < self.per_second:
+            return True
+        self.dropped += 1
+        return False
+
+
+class DatabaseLogSink:
+    """loguru sink：缓存日志记录，按批量大小或时间间隔写入 logs 表"""
+    
+    def __init__(self, submit, batch_size=LOG_TABLE_BATCH_SIZE, max_pending=LOG_TABLE_MAX_PENDING):
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.ready = False  # 数据库初始化完成前只缓存不写入
+        self.dropped = 0
+        self._submit = submit
+        self._pending = []
+        self._lock = threading.Lock()
+    
+    def __call__(self, message):
+        record = message.record
+        details = record["extra"].get("details")
+        if details is None and record["exception"]:
+            # enqueue=True 时 record 中的 traceback 已被丢弃，改用 loguru 入队前格式化好的异常文本
+            details = str(message).strip()
+        
+        row = {
+            "timestamp": record["time"].replace(tzinfo=None),
+            "level": record["level"].name,
+            "module": (record["name"] or "")[:50],
+            "function": (record["function"] or "")[:100],
+            "message": record["message"],
+            "details": json.dumps(details, ensure_ascii=False, default=str) if details is not None else None,
+        }
+        
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+        
+        if full:
+            self.flush()
+    
+    def flush(self):
+        """把缓存的记录交给数据库线程写入"""
+        if not self.ready:
+            return
+        
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._submit(batch)
+
+
+class EventLoopProfiler:
+    """事件循环阻塞分析器
+    
+    asyncio 调试模式报告超过阈值的慢回调；看门狗线程在事件循环心跳停止时
+    采样事件循环线程的调用栈，并把每次阻塞归属到当时正在运行的任务。
+    """
+    
+    def __init__(self, on_stall, threshold=SLOW_CALLBACK_THRESHOLD_SECONDS, output_path=PROFILE_OUTPUT_PATH):
+        self.threshold = threshold
+        self.output_path = Path(output_path)
+        self.current_job = None
+        self._on_stall = on_stall
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._log_handler = None
+    
+    def start(self):
+        """在事件循环线程中调用，开启调试钩子和看门狗线程"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        
+        # asyncio 调试模式会以 WARNING 记录执行时间超过阈值的回调
+        self._loop.set_debug(True)
+        self._loop.slow_callback_duration = self.threshold
+        self._log_handler = _SlowCallbackHandler(self)
+        logging.getLogger("asyncio").addHandler(self._log_handler)
+        
+        self._thread = threading.Thread(target=self._watchdog, name="astraeus-loop-watchdog", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止看门狗线程并关闭调试钩子"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.threshold * 5)
+        if self._log_handler:
+            logging.getLogger("asyncio").removeHandler(self._log_handler)
+        if self._loop and not self._loop.is_closed():
+            self._loop.set_debug(False)
+    
+    async def heartbeat(self):
+        """事件循环心跳，看门狗据此判断事件循环是否被阻塞"""
+        while True:
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.threshold / 2)
+    
+    def _watchdog(self):
+        """看门狗线程：心跳超时即采样事件循环线程的调用栈"""
+        stall_started = None
+        stall_job = None
+        samples = Counter()
+        
+        while not self._stop_event.wait(self.threshold / 4):
+            heartbeat = self._heartbeat
+            if time.monotonic() - heartbeat > self.threshold:
+                if stall_started is None:
+                    stall_started = heartbeat
+                    stall_job = self.current_job
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    samples[self._fold_stack(frame)] += 1
+            elif stall_started is not None:
+                self._finish_stall(heartbeat - stall_started, stall_job, samples)
+                stall_started = None
+                samples = Counter()
+    
+    def _finish_stall(self, duration, job, samples):
+        """写出火焰图样本并上报一次阻塞"""
+        root = job or "idle"
+        try:
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.output_path.open("a", encoding="utf-8") as f:
+                for stack, count in samples.items():
+                    f.write(f"{root};{stack} {count}\n")
+        except OSError as e:
+            logger.error(f"写入阻塞分析文件失败: {e}")
+        
+        top_stack = samples.most_common(1)[0][0] if samples else ""
+        self._on_stall({
+            "kind": "loop_stall",
+            "duration_ms": round(duration * 1000, 1),
+            "job": job,
+            "samples": sum(samples.values()),
+            "stack": top_stack,
+        })
+    
+    def report_slow_callback(self, message):
+        """由 asyncio 慢回调日志触发"""
+        self._on_stall({
+            "kind": "slow_callback",
+            "job": self.current_job,
+            "callback": message,
+        })
+    
+    @staticmethod
+    def _fold_stack(frame):
+        """把调用栈折叠为火焰图格式（外层在前，以分号分隔）"""
+        return ";".join(
+            f"{entry.name} ({Path(entry.filename).name}:{entry.lineno})"
+            for entry in traceback.extract_stack(frame)
+        )
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """把 asyncio 的慢回调警告转交给分析器"""
+    
+    def __init__(self, profiler):
+        super().__init__(level=logging.WARNING)
+        self.profiler = profiler
+    
+    def emit(self, record):
+        message = record.getMessage()
+        if message.startswith("Executing "):
+            self.profiler.report_slow_callback(message)
 
 
 class AstraeusSystem:
     """Astraeus 主系统"""
     
-    def __init__(self):
+    def __init__(self, profile=False):
         self.running = False
+        self._shutdown_event = asyncio.Event()
+        self._tasks = set()
+        self._http_runner = None
+        self._profiler = EventLoopProfiler(self._record_stall) if profile else None
+        self._log_sink = DatabaseLogSink(self._submit_log_batch)
+        # 每个处理器各用一个限流器，同一条记录不会在共享计数中被统计两次
+        self._console_limiter = DebugRateLimiter()
+        self._file_limiter = DebugRateLimiter()
+        # 专用数据库线程：SQLite 写入串行执行，且不阻塞事件循环
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="astraeus-db")
         self.setup_logging()
         self.setup_signal_handlers()
     
@@ -30,12 +443,15 @@ class AstraeusSystem:
         """设置日志"""
         logger.remove()  # 移除默认处理器
         
+        # 所有处理器均使用 enqueue=True，由 loguru 后台线程写出，调用方不会阻塞在磁盘 I/O 上
         # 添加控制台处理器
         logger.add(
             sys.stdout,
             format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
             level=config.system.log_level,
-            colorize=True
+            colorize=True,
+            filter=self._console_limiter,
+            enqueue=True
         )
         
         # 添加文件处理器
@@ -44,19 +460,58 @@ class AstraeusSystem:
             rotation="1 day",
             retention="30 days",
             format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-            level="DEBUG"
+            level="DEBUG",
+            filter=self._file_limiter,
+            enqueue=True
+        )
+        
+        # 添加结构化 JSON 处理器（每行一条记录）
+        logger.add(
+            "logs/astraeus.json",
+            rotation="1 day",
+            retention="30 days",
+            level="INFO",
+            serialize=True,
+            enqueue=True
+        )
+        
+        # 添加数据库处理器；写入失败的报错带 skip_db 标记，避免循环写入
+        # 格式只保留异常堆栈（消息本身单独入库），且不记录堆栈中的变量值，避免敏感信息入库
+        logger.add(
+            self._log_sink,
+            format="",
+            diagnose=False,
+            level=LOG_TABLE_LEVEL,
+            filter=lambda record: not record["extra"].get("skip_db"),
+            enqueue=True
         )
         
         logger.info("Astraeus 系统启动中...")
     
     def setup_signal_handlers(self):
         """设置信号处理器"""
-        def signal_handler(signum, frame):
-            logger.info(f"收到信号 {signum}，正在优雅关闭...")
-            self.running = False
+        loop = asyncio.get_running_loop()
         
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.request_shutdown, sig)
+            except NotImplementedError:
+                # Windows 事件循环不支持 add_signal_handler，退回到线程安全的回调
+                signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(self.request_shutdown, signum))
+    
+    def request_shutdown(self, signum=None):
+        """请求关闭系统，唤醒主循环"""
+        if signum is not None:
+            logger.info(f"收到信号 {signum}，正在优雅关闭...")
+        self.running = False
+        self._shutdown_event.set()
+    
+    def _create_task(self, coro):
+        """创建受管理的后台任务，关闭时统一取消"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
     
     async def initialize(self):
         """初始化系统"""
@@ -64,13 +519,19 @@ class AstraeusSystem:
             logger.info("正在初始化 Astraeus 系统...")
             
             # 初始化数据库
-            db_manager.initialize()
-            logger.info("数据库初始化完成")
+            await self._run_db(db_manager.initialize)
+            sqlite_settings = await self._run_db(self._read_sqlite_settings)
+            logger.info(f"数据库初始化完成，SQLite 实际配置: {sqlite_settings}")
+            if sqlite_settings and str(sqlite_settings.get("journal_mode", "")).lower() != "wal":
+                logger.warning(f"SQLite 未能启用 WAL 模式，当前日志模式: {sqlite_settings.get('journal_mode')}")
             
             # 测试数据库连接
-            if not db_manager.test_connection():
+            if not await self._run_db(db_manager.test_connection):
                 raise Exception("数据库连接测试失败")
             
+            # 创建最新状态汇总表及其触发器
+            await self._run_db(self._ensure_summary_tables)
+            
             # 初始化资产数据（如果需要）
             await self._initialize_assets()
             
@@ -80,61 +541,285 @@ class AstraeusSystem:
             logger.error(f"系统初始化失败: {e}")
             raise
     
+    async def _run_db(self, func, *args):
+        """在数据库线程中执行同步数据库操作"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._db_executor, func, *args)
+    
+    @staticmethod
+    def _read_sqlite_settings():
+        """读取 SQLite 实际生效的配置（不支持 WAL 的文件系统上 journal_mode 会保持原值）"""
+        session = db_manager.get_session()
+        try:
+            if session.get_bind().dialect.name != "sqlite":
+                return {}
+            return {
+                name: session.execute(text(f"PRAGMA {name}")).scalar()
+                for name in SQLITE_PRAGMAS
+            }
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _ensure_summary_tables():
+        """创建汇总表和触发器（幂等）"""
+        session = db_manager.get_session()
+        try:
+            for statement in SUMMARY_TABLES_SQL:
+                session.execute(text(statement))
+            for check_statement, seed_statement in SUMMARY_SEED_SQL:
+                if session.execute(text(check_statement)).first() is None:
+                    session.execute(text(seed_statement))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
     async def _initialize_assets(self):
-        """初始化资产数据"""
+        """初始化并刷新资产数据"""
         try:
-            from src.database.models import Asset
             from src.data.providers import data_aggregator
             
-            async with db_manager.get_session_async() as session:
-                # 检查是否已有资产数据
-                existing_assets = session.query(Asset).count()
-                
-                if existing_assets == 0:
-                    logger.info("正在初始化资产数据...")
-                    
-                    # 获取市值排名前20的资产
-                    top_assets = await data_aggregator.get_top_market_cap_assets(limit=20)
-                    
-                    for asset_data in top_assets:
-                        asset = Asset(
-                            symbol=asset_data["symbol"],
-                            name=asset_data["name"],
-                            asset_type="CRYPTO",  # 简化处理
-                            market_cap=asset_data["market_cap"],
-                            volume_24h=asset_data["volume_24h"],
-                            price=asset_data["price"],
-                            price_change_24h=asset_data["price_change_24h"],
-                            is_active=True,
-                            exchange_support="binance"
-                        )
-                        session.add(asset)
-                    
-                    session.commit()
-                    logger.info(f"已初始化 {len(top_assets)} 个资产")
-                else:
-                    logger.info(f"已有 {existing_assets} 个资产，跳过初始化")
+            # 每次启动都刷新整个资产池的价格、市值和成交量
+            with PROVIDER_REQUEST_SECONDS.labels("data_aggregator", "top_market_cap_assets").time():
+                top_assets = await data_aggregator.get_top_market_cap_assets(limit=ASSET_UNIVERSE_SIZE)
+            if not top_assets:
+                logger.warning("未获取到资产数据，跳过资产刷新")
+                return
+            
+            upserted = await self._run_db(self._upsert_assets, top_assets)
+            
+            logger.info(f"已刷新 {upserted} 个资产")
                     
         except Exception as e:
             logger.error(f"初始化资产数据失败: {e}")
     
+    @staticmethod
+    def _upsert_assets(assets_data):
+        """批量写入资产 (INSERT ... ON CONFLICT(symbol) DO UPDATE)"""
+        from src.database.models import Asset
+        
+        now = datetime.now()
+        rows = {}
+        for asset_data in assets_data:
+            # 同一批次内重复的符号以最后一条为准
+            rows[asset_data["symbol"]] = {
+                "symbol": asset_data["symbol"],
+                "name": asset_data["name"],
+                "asset_type": "CRYPTO",  # 简化处理
+                "market_cap": asset_data["market_cap"],
+                "volume_24h": asset_data["volume_24h"],
+                "price": asset_data["price"],
+                "price_change_24h": asset_data["price_change_24h"],
+                "is_active": False,
+                "exchange_support": "binance",
+                "created_at": now,
+                "updated_at": now,
+            }
+        
+        if not rows:
+            return 0
+        
+        stmt = sqlite_insert(Asset.__table__)
+        # 已存在的资产只刷新行情字段，保留 is_active 等人工设置
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["symbol"],
+            set_={
+                "name": stmt.excluded.name,
+                "market_cap": stmt.excluded.market_cap,
+                "volume_24h": stmt.excluded.volume_24h,
+                "price": stmt.excluded.price,
+                "price_change_24h": stmt.excluded.price_change_24h,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+        
+        session = db_manager.get_session()
+        try:
+            # 新资产按市值排名补足活跃名额，其余以非活跃状态入库，避免活跃资产数随资产池扩大
+            existing = dict(session.execute(text("SELECT symbol, is_active FROM assets")).all())
+            active_slots = ACTIVE_ASSET_LIMIT - sum(1 for is_active in existing.values() if is_active)
+            for symbol, row in rows.items():
+                if active_slots <= 0:
+                    break
+                if symbol not in existing:
+                    row["is_active"] = True
+                    active_slots -= 1
+            
+            with DB_FLUSH_SECONDS.labels("assets_upsert").time():
+                session.execute(stmt, list(rows.values()))
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        
+        return len(rows)
+    
+    async def _asset_refresh_loop(self):
+        """定时刷新资产池"""
+        while not self._shutdown_event.is_set():
+            try:
+                await asyncio.wait_for(self._shutdown_event.wait(), timeout=ASSET_REFRESH_INTERVAL_HOURS * 3600)
+            except asyncio.TimeoutError:
+                with SCHEDULER_JOB_SECONDS.labels("asset_refresh").time(), self._profile_job("asset_refresh"):
+                    await self._initialize_assets()
+    
+    @contextmanager
+    def _profile_job(self, name):
+        """标记当前运行的任务，用于归属事件循环阻塞"""
+        if not self._profiler:
+            yield
+            return
+        
+        previous = self._profiler.current_job
+        self._profiler.current_job = name
+        try:
+            yield
+        finally:
+            self._profiler.current_job = previous
+    
+    def _record_stall(self, stall):
+        """记录一次事件循环阻塞（在看门狗线程或事件循环线程中调用）"""
+        if stall["kind"] == "loop_stall":
+            message = f"事件循环阻塞 {stall['duration_ms']} ms (任务: {stall['job'] or '无'})"
+        else:
+            message = f"慢回调 (任务: {stall['job'] or '无'}): {stall['callback']}"
+        logger.bind(details=stall).warning(message)
+    
+    def _submit_log_batch(self, batch):
+        """把一批日志记录交给数据库线程写入"""
+        try:
+            self._db_executor.submit(self._insert_logs, batch)
+        except RuntimeError:
+            # 数据库线程已关闭
+            pass
+    
+    @staticmethod
+    def _insert_logs(batch):
+        """批量写入 logs 表"""
+        session = db_manager.get_session()
+        try:
+            with DB_FLUSH_SECONDS.labels("logs_insert").time():
+                session.execute(
+                    text(
+                        "INSERT INTO logs (timestamp, level, module, function, message, details) "
+                        "VALUES (:timestamp, :level, :module, :function, :message, :details)"
+                    ).bindparams(bindparam("timestamp", type_=DateTime())),
+                    batch
+                )
+                session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.bind(skip_db=True).error(f"写入日志表失败: {e}")
+        finally:
+            session.close()
+    
+    async def _flush_log_table_loop(self):
+        """定期把缓存的日志写入 logs 表"""
+        while True:
+            await asyncio.sleep(LOG_TABLE_FLUSH_INTERVAL_SECONDS)
+            self._log_sink.flush()
+    
+    async def _monitor_event_loop_lag(self):
+        """持续采样事件循环延迟"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LOOP_LAG_SAMPLE_INTERVAL_SECONDS)
+            lag = loop.time() - started - LOOP_LAG_SAMPLE_INTERVAL_SECONDS
+            EVENT_LOOP_LAG_SECONDS.observe(max(lag, 0))
+    
+    async def _start_http_server(self):
+        """启动 HTTP 服务（/metrics、/health）"""
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        app.router.add_get("/health", self._handle_health)
+        
+        self._http_runner = web.AppRunner(app)
+        await self._http_runner.setup()
+        try:
+            await web.TCPSite(self._http_runner, METRICS_HOST, METRICS_PORT).start()
+        except OSError as e:
+            # 端口被占用等情况不影响交易主流程，只是没有监控端点
+            logger.error(f"监控端点启动失败，将在没有 /metrics、/health 的情况下继续运行: {e}")
+            await self._http_runner.cleanup()
+            self._http_runner = None
+            return
+        logger.info(f"监控端点已启动: http://{METRICS_HOST}:{METRICS_PORT}/metrics, /health")
+    
+    @staticmethod
+    async def _handle_metrics(request):
+        """导出 Prometheus 指标"""
+        return web.Response(body=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+    
+    async def _handle_health(self, request):
+        """并发执行健康检查探针，复用进程内已加载的组件"""
+        from src.data.providers import data_aggregator
+        
+        probes = {
+            "database": self._probe_database,
+            "scheduler": self._probe_scheduler,
+            "telegram": telegram_probe(config.api.telegram_bot_token),
+            **provider_probes(data_aggregator),
+        }
+        results = await run_health_checks(probes)
+        healthy = all(result["ok"] for result in results)
+        
+        return web.json_response(
+            {"status": "ok" if healthy else "degraded", "probes": results},
+            status=200 if healthy else 503
+        )
+    
+    async def _probe_database(self):
+        """数据库探针"""
+        if not await self._run_db(db_manager.test_connection):
+            raise RuntimeError("连接测试失败")
+        return "查询正常"
+    
+    async def _probe_scheduler(self):
+        """调度器探针：进程在运行，且调度任务仍在按时产出系统状态记录（与 status.py 检查一致）"""
+        if not self.running:
+            raise RuntimeError("系统未运行")
+        detail = await scheduler_probe()()
+        return f"{detail}，后台任务 {len(self._tasks)} 个"
+    
     async def start(self):
         """启动系统"""
         try:
-            await self.initialize()
+            # 开启事件循环阻塞分析
+            if self._profiler:
+                self._profiler.start()
+                self._create_task(self._profiler.heartbeat())
+                logger.info(f"事件循环阻塞分析已开启，阈值 {self._profiler.threshold * 1000:.0f} ms")
+            
+            with self._profile_job("startup"):
+                await self.initialize()
+            
+            # 数据库就绪后开始把日志写入 logs 表
+            self._log_sink.ready = True
+            self._log_sink.flush()
+            self._create_task(self._flush_log_table_loop())
+            
+            # 启动监控端点和事件循环延迟采样
+            await self._start_http_server()
+            self._create_task(self._monitor_event_loop_lag())
             
             # 启动自动化调度器
             await automation_scheduler.start()
             
             self.running = True
+            self._create_task(self._asset_refresh_loop())
             logger.info("🚀 Astraeus 系统启动成功！")
             
             # 发送启动通知
             await telegram_notifier.send_notification("🚀 Astraeus 系统已启动并开始运行")
             
-            # 主循环
-            while self.running:
-                await asyncio.sleep(1)
+            # 主循环：等待关闭信号
+            await self._shutdown_event.wait()
             
         except Exception as e:
             logger.error(f"系统启动失败: {e}")
@@ -145,25 +830,68 @@ class AstraeusSystem:
         """关闭系统"""
         try:
             logger.info("正在关闭 Astraeus 系统...")
+            self.request_shutdown()
+            
+            # 先停止阻塞分析，避免把关闭过程中心跳任务的取消误报为阻塞
+            if self._profiler:
+                self._profiler.stop()
+            
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + SHUTDOWN_DRAIN_TIMEOUT_SECONDS
+            
+            # 取消后台任务（包括其中进行中的 HTTP 请求和数据库写入）
+            tasks = [task for task in self._tasks if not task.done()]
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                _, pending = await asyncio.wait(tasks, timeout=max(deadline - loop.time(), 0))
+                if pending:
+                    logger.warning(f"{len(pending)} 个后台任务未在截止时间内退出")
             
             # 停止调度器
-            await automation_scheduler.stop()
+            await self._drain(automation_scheduler.stop(), deadline, "调度器")
+            
+            # 停止 HTTP 服务
+            if self._http_runner:
+                await self._drain(self._http_runner.cleanup(), deadline, "HTTP 服务")
             
-            # 关闭数据库连接
-            db_manager.close()
+            # 写出日志队列和缓存中剩余的记录
+            await logger.complete()
+            self._log_sink.flush()
+            if self._console_limiter.dropped or self._file_limiter.dropped or self._log_sink.dropped:
+                logger.info(f"已限流丢弃 DEBUG 日志: 控制台 {self._console_limiter.dropped} 条，"
+                            f"日志文件 {self._file_limiter.dropped} 条，"
+                            f"日志表缓存溢出丢弃 {self._log_sink.dropped} 条")
+            
+            # 等待数据库线程中的写入完成后关闭连接
+            if await self._drain(self._run_db(db_manager.close), deadline, "数据库"):
+                self._db_executor.shutdown(wait=True)
+            else:
+                self._db_executor.shutdown(wait=False)
             
             # 发送关闭通知
-            await telegram_notifier.send_notification("🛑 Astraeus 系统已关闭")
+            await self._drain(telegram_notifier.send_notification("🛑 Astraeus 系统已关闭"), deadline, "关闭通知")
             
             logger.info("Astraeus 系统已安全关闭")
             
         except Exception as e:
             logger.error(f"系统关闭失败: {e}")
+    
+    @staticmethod
+    async def _drain(awaitable, deadline, name):
+        """在关闭截止时间内等待操作完成，超时则放弃"""
+        remaining = max(deadline - asyncio.get_running_loop().time(), 0)
+        try:
+            await asyncio.wait_for(awaitable, timeout=remaining)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"{name}未在关闭截止时间内完成，已放弃等待")
+            return False
 
 
 async def main():
     """主函数"""
-    system = AstraeusSystem()
+    system = AstraeusSystem(profile=PROFILE_ENABLED)
     
     try:
         await system.start()
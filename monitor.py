@@ -5,53 +5,106 @@ Astraeus 系统监控脚本
 """
 
 import asyncio
+import shutil
 import time
 import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
 
-def print_header(title):
-    """打印标题"""
-    print(f"\n{'='*60}")
-    print(f"📊 {title}")
-    print(f"{'='*60}")
+DB_PATH = Path("trading_system.db")
+DB_BUSY_TIMEOUT_SECONDS = 5
+
+# 检查数据变更的间隔（只读取 PRAGMA data_version，开销极小）
+POLL_INTERVAL_SECONDS = 0.5
+# 无数据变更时的定期刷新间隔，用于更新"多久前"等相对时间
+IDLE_REFRESH_SECONDS = 30
+# 标题占用的行数，区块从其下方开始绘制
+TITLE_LINES = 2
+
+_connection = None
+
+def get_connection():
+    """获取只读数据库连接（进程内复用，不阻塞主进程写入）"""
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, timeout=DB_BUSY_TIMEOUT_SECONDS)
+        _connection.execute("PRAGMA query_only=ON")
+    return _connection
+
+def query_with_fallback(cursor, sql, fallback_sql):
+    """优先查询主进程维护的汇总表，汇总表尚未创建时回退到原始表"""
+    try:
+        cursor.execute(sql)
+    except sqlite3.OperationalError:
+        cursor.execute(fallback_sql)
+    return cursor
+
+def count_rows(cursor, table):
+    """获取表记录数"""
+    row = query_with_fallback(
+        cursor,
+        f"SELECT row_count FROM table_counts WHERE table_name = '{table}';",
+        f"SELECT COUNT(*) FROM {table};"
+    ).fetchone()
+    return row[0] if row else 0
+
+def get_write_age_ms():
+    """获取距最近一次计数表写入的毫秒数（由汇总表触发器记录写入时间），无法获取时返回None"""
+    try:
+        row = get_connection().execute(
+            "SELECT (julianday('now') - MAX(updated_at)) * 86400000.0 FROM table_counts;"
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+def get_data_version():
+    """获取数据库版本号，其他连接提交写入后会变化"""
+    try:
+        return get_connection().execute("PRAGMA data_version;").fetchone()[0]
+    except sqlite3.Error:
+        return None
+
+def format_header(title):
+    """生成标题行"""
+    return ["", "=" * 60, f"📊 {title}", "=" * 60]
 
 def get_system_status():
     """获取系统状态"""
     try:
         # 检查数据库
-        db_path = Path("trading_system.db")
-        if not db_path.exists():
+        if not DB_PATH.exists():
             return "❌ 数据库文件不存在"
         
-        conn = sqlite3.connect("trading_system.db")
+        conn = get_connection()
         cursor = conn.cursor()
         
         # 检查资产数量
-        cursor.execute("SELECT COUNT(*) FROM assets;")
-        asset_count = cursor.fetchone()[0]
+        asset_count = count_rows(cursor, "assets")
         
         # 检查价格记录
-        cursor.execute("SELECT COUNT(*) FROM prices;")
-        price_count = cursor.fetchone()[0]
+        price_count = count_rows(cursor, "prices")
         
         # 检查最新价格更新时间
-        cursor.execute("SELECT MAX(timestamp) FROM prices;")
-        latest_price = cursor.fetchone()[0]
+        latest_price = query_with_fallback(
+            cursor,
+            "SELECT MAX(timestamp) FROM latest_price;",
+            "SELECT MAX(timestamp) FROM prices;"
+        ).fetchone()[0]
         
         # 检查分析记录
         try:
-            cursor.execute("SELECT COUNT(*) FROM analysis;")
-            analysis_count = cursor.fetchone()[0]
+            analysis_count = count_rows(cursor, "analyses")
             
-            cursor.execute("SELECT MAX(timestamp) FROM analysis;")
-            latest_analysis = cursor.fetchone()[0]
+            latest_analysis = query_with_fallback(
+                cursor,
+                "SELECT MAX(timestamp) FROM latest_analysis;",
+                "SELECT MAX(timestamp) FROM analyses;"
+            ).fetchone()[0]
         except sqlite3.OperationalError:
             analysis_count = 0
             latest_analysis = None
         
-        conn.close()
-        
         # 计算时间差
         now = datetime.now()
         price_age = "未知"
@@ -80,7 +133,7 @@ def get_system_status():
 def get_top_assets():
     """获取热门资产"""
     try:
-        conn = sqlite3.connect("trading_system.db")
+        conn = get_connection()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -92,8 +145,6 @@ def get_top_assets():
         """)
         
         assets = cursor.fetchall()
-        conn.close()
-        
         return assets
         
     except Exception as e:
@@ -102,101 +153,200 @@ def get_top_assets():
 def get_recent_activity():
     """获取最近活动"""
     try:
-        conn = sqlite3.connect("trading_system.db")
+        conn = get_connection()
         cursor = conn.cursor()
         
         # 获取最近的价格更新
-        cursor.execute("""
+        recent_prices = query_with_fallback(
+            cursor,
+            """
+            SELECT a.symbol, p.close_price, p.timestamp
+            FROM latest_price p
+            JOIN assets a ON p.asset_id = a.id
+            ORDER BY p.timestamp DESC
+            LIMIT 5
+            """,
+            """
             SELECT a.symbol, p.close_price, p.timestamp
             FROM prices p
             JOIN assets a ON p.asset_id = a.id
             ORDER BY p.timestamp DESC
             LIMIT 5
-        """)
-        
-        recent_prices = cursor.fetchall()
+            """
+        ).fetchall()
         
         # 获取最近的分析
         try:
-            cursor.execute("""
+            recent_analysis = query_with_fallback(
+                cursor,
+                """
                 SELECT a.symbol, an.signal_type, an.signal_strength, an.timestamp
-                FROM analysis an
+                FROM latest_analysis an
                 JOIN assets a ON an.asset_id = a.id
                 ORDER BY an.timestamp DESC
                 LIMIT 5
-            """)
-            
-            recent_analysis = cursor.fetchall()
+                """,
+                """
+                SELECT a.symbol, an.signal_type, an.signal_strength, an.timestamp
+                FROM analyses an
+                JOIN assets a ON an.asset_id = a.id
+                ORDER BY an.timestamp DESC
+                LIMIT 5
+                """
+            ).fetchall()
         except sqlite3.OperationalError:
             recent_analysis = []
         
-        conn.close()
-        
         return recent_prices, recent_analysis
         
     except Exception as e:
         return [], []
 
-async def main():
-    """主监控函数"""
+def render_system_status():
+    """生成系统状态区块"""
+    lines = format_header("系统状态")
+    status = get_system_status()
+    
+    if isinstance(status, dict):
+        lines += [
+            f"状态: {status['status']}",
+            f"资产数量: {status['assets']}",
+            f"价格记录: {status['prices']}",
+            f"最新价格更新: {status['price_age']} 前",
+            f"分析记录: {status['analysis']}",
+            f"最新分析: {status['analysis_age']} 前",
+        ]
+    else:
+        lines.append(status)
+    
+    return lines
+
+def render_top_assets():
+    """生成热门资产区块"""
+    lines = format_header("热门资产")
+    assets = get_top_assets()
+    
+    if assets:
+        lines.append(f"{'符号':<8} {'价格':<12} {'市值':<15} {'更新时间'}")
+        lines.append("-" * 50)
+        for symbol, price, market_cap, updated_at in assets:
+            price_str = f"${price:.4f}" if price else "N/A"
+            market_cap_str = f"${market_cap/1e9:.1f}B" if market_cap else "N/A"
+            updated_str = updated_at[:19] if updated_at else "N/A"
+            lines.append(f"{symbol:<8} {price_str:<12} {market_cap_str:<15} {updated_str}")
+    else:
+        lines.append("暂无资产数据")
+    
+    return lines
+
+def render_recent_activity():
+    """生成最近活动区块"""
+    lines = format_header("最近活动")
+    recent_prices, recent_analysis = get_recent_activity()
+    
+    if recent_prices:
+        lines.append("📊 最新价格更新:")
+        for symbol, price, timestamp in recent_prices:
+            time_str = timestamp[:19] if timestamp else "N/A"
+            lines.append(f"  {symbol}: ${price:.4f} ({time_str})")
+    
+    if recent_analysis:
+        lines += ["", "📈 最新分析结果:"]
+        for symbol, signal, strength, timestamp in recent_analysis:
+            time_str = timestamp[:19] if timestamp else "N/A"
+            signal_emoji = "🟢" if signal == "BUY" else "🔴" if signal == "SELL" else "🟡"
+            lines.append(f"  {signal_emoji} {symbol}: {signal} (强度: {strength:.2f}) ({time_str})")
+    
+    return lines
+
+def render_monitor_info(latency_ms, refresh_ms):
+    """生成监控信息区块"""
+    latency = f"{latency_ms:.0f} ms" if latency_ms is not None else "未知"
+    return format_header("监控信息") + [
+        f"⏰ 最后刷新: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"⚡ 更新延迟: {latency}（写入 → 显示，其中查询 {refresh_ms:.1f} ms）",
+        "💡 提示: 数据库有写入时自动刷新，无需等待",
+        "📱 使用Telegram命令 /status 查看详细状态",
+    ]
+
+def draw_title():
+    """清屏并绘制标题"""
+    print("\033[2J\033[H", end="")
     print("🚀 Astraeus 系统监控")
     print("按 Ctrl+C 停止监控")
-    print()
+
+def redraw(previous, current):
+    """从第一个发生变化的区块开始重绘，未变化的区块保持不动
+    
+    返回屏幕内容是否仍与区块位置对应，不对应时下次需要整屏重绘
+    """
+    first_changed = next(
+        (i for i, (old, new) in enumerate(zip(previous, current)) if old != new),
+        None
+    )
+    if first_changed is None:
+        return True
+    
+    # 内容高于终端时屏幕会滚动，绝对行号不再对应，退回整屏重绘
+    total_lines = TITLE_LINES + sum(len(section) for section in current)
+    fits = total_lines < shutil.get_terminal_size().lines
+    if first_changed == 0 or not fits:
+        draw_title()
+        first_changed = 0
+    else:
+        row = TITLE_LINES + sum(len(section) for section in current[:first_changed]) + 1
+        print(f"\033[{row};1H\033[J", end="")
+    
+    for section in current[first_changed:]:
+        print("\n".join(section))
+    return fits
+
+async def main():
+    """主监控函数"""
+    sections = [None] * 4
+    synced = False
+    terminal_size = None
+    last_version = None
+    last_refresh = 0.0
+    last_poll = time.monotonic()
+    latency_ms = None
     
     try:
         while True:
-            # 清屏
-            print("\033[2J\033[H", end="")
-            
-            print_header("系统状态")
-            status = get_system_status()
-            
-            if isinstance(status, dict):
-                print(f"状态: {status['status']}")
-                print(f"资产数量: {status['assets']}")
-                print(f"价格记录: {status['prices']}")
-                print(f"最新价格更新: {status['price_age']} 前")
-                print(f"分析记录: {status['analysis']}")
-                print(f"最新分析: {status['analysis_age']} 前")
-            else:
-                print(status)
-            
-            print_header("热门资产")
-            assets = get_top_assets()
-            if assets:
-                print(f"{'符号':<8} {'价格':<12} {'市值':<15} {'更新时间'}")
-                print("-" * 50)
-                for symbol, price, market_cap, updated_at in assets:
-                    price_str = f"${price:.4f}" if price else "N/A"
-                    market_cap_str = f"${market_cap/1e9:.1f}B" if market_cap else "N/A"
-                    updated_str = updated_at[:19] if updated_at else "N/A"
-                    print(f"{symbol:<8} {price_str:<12} {market_cap_str:<15} {updated_str}")
-            else:
-                print("暂无资产数据")
-            
-            print_header("最近活动")
-            recent_prices, recent_analysis = get_recent_activity()
+            version = get_data_version()
+            polled_at = time.monotonic()
             
-            if recent_prices:
-                print("📊 最新价格更新:")
-                for symbol, price, timestamp in recent_prices:
-                    time_str = timestamp[:19] if timestamp else "N/A"
-                    print(f"  {symbol}: ${price:.4f} ({time_str})")
+            # 终端尺寸变化后区块位置失效，立即整屏重绘
+            if shutil.get_terminal_size() != terminal_size:
+                terminal_size = shutil.get_terminal_size()
+                synced = False
+                last_refresh = 0.0
             
-            if recent_analysis:
-                print("\n📈 最新分析结果:")
-                for symbol, signal, strength, timestamp in recent_analysis:
-                    time_str = timestamp[:19] if timestamp else "N/A"
-                    signal_emoji = "🟢" if signal == "BUY" else "🔴" if signal == "SELL" else "🟡"
-                    print(f"  {signal_emoji} {symbol}: {signal} (强度: {strength:.2f}) ({time_str})")
+            # 仅在数据库有新写入或空闲刷新到期时重新查询
+            if version != last_version or polled_at - last_refresh >= IDLE_REFRESH_SECONDS:
+                started = time.perf_counter()
+                write_age_ms = get_write_age_ms() if version != last_version else None
+                current = [
+                    render_system_status(),
+                    render_top_assets(),
+                    render_recent_activity(),
+                ]
+                refresh_ms = (time.perf_counter() - started) * 1000
+                
+                # 最近写入发生在本次检测窗口内时才是这次变更，否则变更来自未计数的表（如资产更新）
+                window_ms = (polled_at - last_poll) * 1000
+                if write_age_ms is not None and 0 <= write_age_ms <= window_ms:
+                    latency_ms = write_age_ms + refresh_ms
+                current.append(render_monitor_info(latency_ms, refresh_ms))
+                
+                synced = redraw(sections if synced else [None] * 4, current)
+                sections = current
+                last_version = version
+                last_refresh = time.monotonic()
             
-            print_header("监控信息")
-            print(f"⏰ 当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print("💡 提示: 系统每5分钟更新数据，每10分钟进行分析")
-            print("📱 使用Telegram命令 /status 查看详细状态")
+            last_poll = polled_at
             
-            # 等待30秒
-            await asyncio.sleep(30)
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
             
     except KeyboardInterrupt:
         print("\n\n⏹️  监控已停止")
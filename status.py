@@ -5,10 +5,18 @@ Astraeus 系统状态检查
 """
 
 import asyncio
+import re
 import sqlite3
+import time
 from datetime import datetime
 from pathlib import Path
 
+DB_PATH = Path("trading_system.db")
+# 每个探针的超时时间（秒），探针之间并发执行
+PROBE_TIMEOUT_SECONDS = 5
+# 系统状态记录超过该时间未更新即视为调度器异常
+SCHEDULER_STALE_MINUTES = 30
+
 def print_header(title):
     """打印标题"""
     print(f"\n{'='*50}")
@@ -33,19 +41,36 @@ def check_config():
     except Exception as e:
         print(f"❌ 配置检查失败: {e}")
 
+def count_rows(cursor, table):
+    """获取表记录数，优先读取主进程维护的计数表"""
+    try:
+        cursor.execute("SELECT row_count FROM table_counts WHERE table_name = ?;", (table,))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+    except sqlite3.OperationalError:
+        pass
+    
+    cursor.execute(f"SELECT COUNT(*) FROM {table};")
+    return cursor.fetchone()[0]
+
 def check_database():
     """检查数据库状态"""
     print_header("数据库状态")
     
-    db_path = Path("trading_system.db")
+    db_path = DB_PATH
     if not db_path.exists():
         print("❌ 数据库文件不存在")
         return
     
     try:
-        conn = sqlite3.connect("trading_system.db")
+        # 只读连接，主进程写入时不会互相阻塞
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=PROBE_TIMEOUT_SECONDS)
         cursor = conn.cursor()
         
+        cursor.execute("PRAGMA journal_mode;")
+        print(f"📝 日志模式: {cursor.fetchone()[0]}")
+        
         # 检查表结构
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
         tables = cursor.fetchall()
@@ -53,23 +78,20 @@ def check_database():
         print(f"📋 数据表数量: {len(tables)}")
         
         # 检查资产数量
-        cursor.execute("SELECT COUNT(*) FROM assets;")
-        asset_count = cursor.fetchone()[0]
+        asset_count = count_rows(cursor, "assets")
         print(f"💎 资产数量: {asset_count}")
         
         # 检查价格记录
-        cursor.execute("SELECT COUNT(*) FROM prices;")
-        price_count = cursor.fetchone()[0]
+        price_count = count_rows(cursor, "prices")
         print(f"📊 价格记录: {price_count}")
         
         # 检查交易记录
-        cursor.execute("SELECT COUNT(*) FROM trades;")
-        trade_count = cursor.fetchone()[0]
+        trade_count = count_rows(cursor, "trades")
         print(f"🔄 交易记录: {trade_count}")
         
         # 检查持仓
         try:
-            cursor.execute("SELECT COUNT(*) FROM positions WHERE status = 'ACTIVE';")
+            cursor.execute("SELECT COUNT(*) FROM positions WHERE is_active = 1;")
             active_positions = cursor.fetchone()[0]
             print(f"📈 活跃持仓: {active_positions}")
         except sqlite3.OperationalError:
@@ -80,35 +102,132 @@ def check_database():
     except Exception as e:
         print(f"❌ 数据库检查失败: {e}")
 
-async def check_data_sources():
-    """检查数据源状态"""
-    print_header("数据源状态")
-    
+# Bot API 地址中的令牌（bot<id>:<secret>），不能出现在探针结果里
+BOT_TOKEN_PATTERN = re.compile(r"bot\d+:[\w-]+")
+
+async def run_probe(name, probe, timeout=PROBE_TIMEOUT_SECONDS):
+    """执行单个探针，探针成功时返回说明文字，失败时抛出异常"""
+    started = time.perf_counter()
     try:
-        from src.data.providers import data_aggregator
-        
-        # 测试CoinGecko
+        detail = await asyncio.wait_for(probe(), timeout)
+        ok = True
+    except asyncio.TimeoutError:
+        detail = f"超时 ({timeout}s)"
+        ok = False
+    except Exception as e:
+        detail = BOT_TOKEN_PATTERN.sub("bot***", str(e)) or type(e).__name__
+        ok = False
+    
+    return {
+        "name": name,
+        "ok": ok,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "detail": detail,
+    }
+
+async def run_health_checks(probes, timeout=PROBE_TIMEOUT_SECONDS):
+    """并发执行所有探针，总耗时取决于最慢的探针而不是所有探针之和"""
+    return list(await asyncio.gather(
+        *(run_probe(name, probe, timeout) for name, probe in probes.items())
+    ))
+
+def sqlite_probe(db_path=DB_PATH):
+    """数据库探针：只读连接执行一次查询"""
+    def query():
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=PROBE_TIMEOUT_SECONDS)
+        try:
+            conn.execute("SELECT 1 FROM assets LIMIT 1;").fetchall()
+        finally:
+            conn.close()
+    
+    async def probe():
+        await asyncio.to_thread(query)
+        return "查询正常"
+    
+    return probe
+
+def scheduler_probe(db_path=DB_PATH):
+    """调度器探针：检查最新系统状态记录是否及时更新"""
+    def query():
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=PROBE_TIMEOUT_SECONDS)
         try:
-            market_data = await data_aggregator.coingecko.get_market_data(per_page=1)
-            if market_data:
-                print("✅ CoinGecko: 连接正常")
-            else:
-                print("⚠️  CoinGecko: 连接异常")
-        except Exception as e:
-            print(f"❌ CoinGecko: 连接失败 - {e}")
+            return conn.execute("SELECT MAX(timestamp) FROM system_status;").fetchone()[0]
+        finally:
+            conn.close()
+    
+    async def probe():
+        latest = await asyncio.to_thread(query)
+        if not latest:
+            raise RuntimeError("无系统状态记录")
         
-        # 测试Binance
+        age = datetime.now() - datetime.fromisoformat(latest)
+        if age.total_seconds() > SCHEDULER_STALE_MINUTES * 60:
+            raise RuntimeError(f"系统状态已 {str(age).split('.')[0]} 未更新")
+        return f"最后更新于 {str(age).split('.')[0]} 前"
+    
+    return probe
+
+def telegram_probe(bot_token):
+    """Telegram 探针：调用 Bot API getMe"""
+    async def probe():
+        if not bot_token:
+            return "未配置，已跳过"
+        
+        import aiohttp
         try:
-            ticker = await data_aggregator.binance.get_ticker_24h("BTCUSDT")
-            if ticker:
-                print("✅ Binance: 连接正常")
-            else:
-                print("⚠️  Binance: 连接异常")
-        except Exception as e:
-            print(f"❌ Binance: 连接失败 - {e}")
-            
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"https://api.telegram.org/bot{bot_token}/getMe") as response:
+                    if response.status != 200:
+                        raise RuntimeError(f"HTTP {response.status}")
+                    data = await response.json()
+        except aiohttp.ClientError as e:
+            # aiohttp 的异常信息包含请求地址（即令牌），只保留异常类型
+            raise RuntimeError(f"请求失败: {type(e).__name__}") from None
+        if not data.get("ok"):
+            raise RuntimeError(data.get("description", f"HTTP {response.status}"))
+        return f"@{data['result'].get('username')}"
+    
+    return probe
+
+def provider_probes(data_aggregator):
+    """数据源探针"""
+    async def coingecko():
+        if not await data_aggregator.coingecko.get_market_data(per_page=1):
+            raise RuntimeError("返回数据为空")
+        return "连接正常"
+    
+    async def binance():
+        if not await data_aggregator.binance.get_ticker_24h("BTCUSDT"):
+            raise RuntimeError("返回数据为空")
+        return "连接正常"
+    
+    return {"coingecko": coingecko, "binance": binance}
+
+async def check_health():
+    """并发检查数据源、数据库、Telegram 和调度器"""
+    print_header("健康检查")
+    
+    probes = {"database": sqlite_probe(), "scheduler": scheduler_probe()}
+    
+    try:
+        from src.data.providers import data_aggregator
+        probes.update(provider_probes(data_aggregator))
     except Exception as e:
-        print(f"❌ 数据源检查失败: {e}")
+        print(f"❌ 数据源加载失败: {e}")
+    
+    try:
+        from src.config.settings import config
+        probes["telegram"] = telegram_probe(config.api.telegram_bot_token)
+    except Exception as e:
+        print(f"❌ 配置加载失败: {e}")
+    
+    started = time.perf_counter()
+    results = await run_health_checks(probes)
+    
+    for result in results:
+        icon = "✅" if result["ok"] else "❌"
+        print(f"{icon} {result['name']}: {result['detail']} ({result['latency_ms']:.0f} ms)")
+    print(f"⏱️  总耗时: {(time.perf_counter() - started) * 1000:.0f} ms")
 
 def check_logs():
     """检查日志文件"""
@@ -130,22 +249,24 @@ def check_system_status():
     print_header("系统状态")
     
     try:
-        from src.database.manager import db_manager
-        from src.database.models import SystemStatus
-        
-        # 获取最新系统状态
-        session = db_manager.get_session()
-        latest_status = session.query(SystemStatus).order_by(SystemStatus.timestamp.desc()).first()
+        # 只读取一行，无需加载 ORM
+        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, timeout=PROBE_TIMEOUT_SECONDS)
+        latest_status = conn.execute("""
+            SELECT timestamp, status, active_positions, api_calls_count
+            FROM system_status
+            ORDER BY timestamp DESC
+            LIMIT 1
+        """).fetchone()
+        conn.close()
         
         if latest_status:
-            print(f"🕐 最后更新: {latest_status.timestamp}")
-            print(f"📊 系统状态: {latest_status.status}")
-            print(f"💾 内存使用: {latest_status.memory_usage} MB")
-            print(f"🔄 活跃任务: {latest_status.active_tasks}")
+            timestamp, status, active_positions, api_calls_count = latest_status
+            print(f"🕐 最后更新: {timestamp}")
+            print(f"📊 系统状态: {status}")
+            print(f"📈 活跃持仓: {active_positions}")
+            print(f"🔄 API调用次数: {api_calls_count}")
         else:
             print("⚠️  无系统状态记录")
-            
-        session.close()
         
     except Exception as e:
         print(f"❌ 系统状态检查失败: {e}")
@@ -157,7 +278,7 @@ async def main():
     
     check_config()
     check_database()
-    await check_data_sources()
+    await check_health()
     check_logs()
     check_system_status()
     